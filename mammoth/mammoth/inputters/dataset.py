@@ -100,7 +100,7 @@ class ParallelCorpus(IterableDataset):
         vocab = self.vocabs[side]
         bos = vocab[DefaultTokens.BOS]
         eos = vocab[DefaultTokens.EOS]
-        unk = vocab[DefaultTokens.UNK]
+        unk = vocab.unk_id
         indices = torch.tensor([
             bos,
             *(vocab.stoi.get(token, unk) for token in tokens),
@@ -1,5 +1,5 @@
 import codecs
-import collections
+import functools
 import itertools
 import os
 
@@ -10,7 +10,22 @@ import sentencepiece as spm
 
 DEFAULT_SPECIALS = (DefaultTokens.BOS, DefaultTokens.EOS, DefaultTokens.UNK, DefaultTokens.PAD)
 
+# SentencePiece processors, keyed by model path
+_SPM_CACHE = {}
 
+
+def _get_tokenizer(model_path):
+    tokenizer = _SPM_CACHE.get(model_path)
+    if tokenizer is None:
+        tokenizer = spm.SentencePieceProcessor()
+        if model_path is not None:
+            with open(model_path, 'rb') as f:
+                tokenizer.LoadFromSerializedProto(f.read())
+        _SPM_CACHE[model_path] = tokenizer
+    return tokenizer
+
+
+@functools.lru_cache(maxsize=None)
 def get_vocab(path):
     new_vocab = Vocab(path, items=None)
     logger.debug(new_vocab)
@@ -20,21 +35,31 @@ def get_vocab(path):
 class Vocab():
     def __init__(self, model_path, items=None):
         # Load SentencePiece model
-        self.tokenizer = spm.SentencePieceProcessor(model_file=model_path)
+        self.tokenizer = _get_tokenizer(model_path)
         self.path = model_path
         self.itos = []
-        self.stoi = collections.defaultdict(int)
+        self.stoi = dict()
         self.specials = list(DEFAULT_SPECIALS)
         if items is None:
             items = [self.tokenizer.id_to_piece(i) for i in range(self.tokenizer.get_piece_size())]
         
         # remove specials from items
-        items = [i for i in items if i not in self.specials]
+        specials_set = set(self.specials)
+        items = [i for i in items if i not in specials_set]
         self.add_token(items + self.specials)
         assert len(self.stoi) == len(self.itos)
+        self.unk_id = self.stoi[DefaultTokens.UNK]
         
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'unk_id' not in state:
+            # vocab pickled in an older checkpoint, whose defaultdict stoi may
+            # hold spurious token -> 0 entries from failed lookups
+            self.stoi = {t: i for i, t in enumerate(self.itos)}
+            self.unk_id = self.stoi[DefaultTokens.UNK]
+
     def __getitem__(self, key_str):
-        return self.stoi[key_str]
+        return self.stoi.get(key_str, self.unk_id)
 
     def __len__(self):
         return len(self.stoi)
@@ -43,21 +68,14 @@ class Vocab():
     # TODO: likely can be deleted
     def add_token(self, tokens):
         for t in tokens:
-            new_index = len(self.itos)
             # add to vocab if not already there
-            if t not in self.itos:
+            if t not in self.stoi:
+                self.stoi[t] = len(self.itos)
                 self.itos.append(t)
-                self.stoi[t] = new_index
 
     @classmethod
-    def merge(cls, *vocabs, size=None):
+    def merge(cls, *vocabs):
         """Merge vocabs."""
-        specials = collections.OrderedDict()
-        for vocab in vocabs:
-            for elem in vocab.specials:
-                specials[elem] = None
-        specials = [elem for elem in specials.keys()]
-
         # from itertools recipes https://docs.python.org/3/library/itertools.html#itertools-recipes
         # FIXME: would rather install more-itertools, but for now I'm trying to keep deps as minimal as possible
         def roundrobin(*iterables):
@@ -74,8 +92,9 @@ class Vocab():
                     num_active -= 1
                     nexts = itertools.cycle(itertools.islice(nexts, num_active))
 
+        # duplicates are dropped by add_token, specials are re-added by the constructor
         items = list(roundrobin(*[vocab.stoi.keys() for vocab in vocabs]))
-        return cls(None, items=items, tag='', size=size, specials=specials)
+        return cls(None, items=items)
 
     def __repr__(self):
         return f"{self.__class__.__name__} @ {self.path} ({len(self)} items, specials=[{self.specials}])"
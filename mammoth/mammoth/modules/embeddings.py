@@ -2,13 +2,13 @@
 import math
 import warnings
 
+import numpy as np
 import torch
 import torch.nn as nn
 
 from mammoth.modules.util_class import Elementwise
 # from mammoth.utils.logging import logger
 
-import torch.nn.functional as F
 # import bitsandbytes as bnb
 
 
@@ -30,16 +30,18 @@ class PositionalEncoding(nn.Module):
     def __init__(self, dropout, dim, max_len=5000):
         if dim % 2 != 0:
             raise ValueError("Cannot use sin/cos positional encoding with odd dim (got dim={:d})".format(dim))
-        pe = torch.zeros(max_len, dim)
-        position = torch.arange(0, max_len).unsqueeze(1)
+        position = torch.arange(0, max_len, dtype=torch.float)
         div_term = torch.exp((torch.arange(0, dim, 2, dtype=torch.float) * -(math.log(10000.0) / dim)))
-        pe[:, 0::2] = torch.sin(position.float() * div_term)
-        pe[:, 1::2] = torch.cos(position.float() * div_term)
+        angles = torch.outer(position, div_term)
+        pe = torch.empty(max_len, dim)
+        pe[:, 0::2] = torch.sin(angles)
+        pe[:, 1::2] = torch.cos(angles)
         pe = pe.unsqueeze(1)
         super(PositionalEncoding, self).__init__()
         self.register_buffer('pe', pe)
         self.dropout = nn.Dropout(p=dropout)
         self.dim = dim
+        self.scale = math.sqrt(dim)
 
     def forward(self, emb, step=None):
         """Embed inputs.
@@ -51,14 +53,21 @@ class PositionalEncoding(nn.Module):
                 the encoding for this position.
         """
 
-        emb = emb * math.sqrt(self.dim)
         step = step or 0
         if self.pe.size(0) < step + emb.size(0):
             raise SequenceTooLongError(
                 f"Sequence is {emb.size(0) + step} but PositionalEncoding is"
                 f" limited to {self.pe.size(0)}. See max_len argument."
             )
-        emb = emb + self.pe[step:(emb.size(0) + step)]
+        if emb.size(0) == 1:
+            # stepwise decoding: index the single position instead of slicing
+            pe = self.pe[step]
+        else:
+            pe = self.pe[step:(emb.size(0) + step)]
+        # only the slice read is converted, a no-op if dtypes already match
+        pe = pe.to(emb.dtype)
+        # pe + scale * emb in a single elementwise kernel
+        emb = torch.add(pe, emb, alpha=self.scale)
         emb = self.dropout(emb)
         return emb
 
@@ -146,18 +155,17 @@ class Embeddings(nn.Module):
 
         # The embedding matrix look-up tables. The first look-up table
         # is for words. Subsequent ones are for features, if any exist.
-        emb_params = zip(vocab_sizes, emb_dims, pad_indices)
-
-        emb_params = zip(vocab_sizes, emb_dims, pad_indices)
+        emb_params = list(zip(vocab_sizes, emb_dims, pad_indices))
         if enable_embeddingless is False:
             embeddings = [nn.Embedding(vocab, dim, padding_idx=pad) for vocab, dim, pad in emb_params]
 
         else:
 
             def create_embeddingless(vocab, dim, padding_idx):
-                one_hot_matrix = F.one_hot(torch.arange(vocab)).float()
-                one_hot_embed = torch.cat((one_hot_matrix, torch.zeros((vocab, dim - vocab))), dim=1)
-                one_hot_embed[padding_idx] = torch.zeros(dim).unsqueeze(0)
+                one_hot_embed = torch.zeros(vocab, dim)
+                idx = torch.arange(vocab)
+                one_hot_embed[idx, idx] = 1.0
+                one_hot_embed[padding_idx].zero_()
                 emb = nn.Embedding(vocab, dim, padding_idx=padding_idx)
                 emb.weight = torch.nn.parameter.Parameter(one_hot_embed, requires_grad=False)
                 return emb
@@ -166,6 +174,8 @@ class Embeddings(nn.Module):
                 for vocab, dim, pad in emb_params
             ]
         emb_luts = Elementwise(feat_merge, embeddings)
+        # Without features, every merge reduces to the word look-up alone
+        single_lut = len(embeddings) == 1 and feat_merge is not None
 
         # The final output size of word + feature vectors. This can vary
         # from the word vector size if and only if features are defined.
@@ -181,8 +191,10 @@ class Embeddings(nn.Module):
         super(Embeddings, self).__init__()
         self.make_embedding = nn.Sequential()
         self.make_embedding.add_module('emb_luts', emb_luts)
+        self._single_lut = single_lut
 
-        if feat_merge == 'mlp' and len(feat_vocab_sizes) > 0:
+        self._feat_mlp = feat_merge == 'mlp' and len(feat_vocab_sizes) > 0
+        if self._feat_mlp:
             in_dim = sum(emb_dims)
             mlp = nn.Sequential(nn.Linear(in_dim, word_vec_size), nn.ReLU())
             self.make_embedding.add_module('mlp', mlp)
@@ -246,11 +258,12 @@ class Embeddings(nn.Module):
             pretrained = torch.load(emb_file)
             pretrained_vec_size = pretrained.size(1)
             if self.word_vec_size > pretrained_vec_size:
-                self.word_lut.weight.data[:, :pretrained_vec_size] = pretrained
-            elif self.word_vec_size < pretrained_vec_size:
-                self.word_lut.weight.data.copy_(pretrained[:, : self.word_vec_size])
+                # the remaining dimensions keep their initialization
+                self.word_lut.weight.data[:, :pretrained_vec_size].copy_(pretrained, non_blocking=True)
             else:
-                self.word_lut.weight.data.copy_(pretrained)
+                # truncate on the host so the transfer is a single contiguous copy
+                pretrained = pretrained[:, : self.word_vec_size].contiguous()
+                self.word_lut.weight.data.copy_(pretrained, non_blocking=True)
 
     def forward(self, source, step=None):
         """Computes the embeddings for words and features.
@@ -262,14 +275,15 @@ class Embeddings(nn.Module):
             FloatTensor: Word embeddings ``(len, batch, embedding_size)``
         """
 
-        if self.position_encoding:
-            for i, module in enumerate(self.make_embedding._modules.values()):
-                if i == len(self.make_embedding._modules.values()) - 1:
-                    source = module(source, step=step)
-                else:
-                    source = module(source)
+        if self._single_lut:
+            assert source.size(2) == 1
+            source = self.word_lut(source[:, :, 0])
         else:
-            source = self.make_embedding(source)
+            source = self.emb_luts(source)
+            if self._feat_mlp:
+                source = self.make_embedding.mlp(source)
+        if self.position_encoding:
+            source = self.make_embedding.pe(source, step=step)
 
         return source
 
@@ -347,13 +361,21 @@ def read_embeddings(path, skip_lines=0, filter_set=None):
                 # is this reachable?
                 continue
 
-            l_split = line.decode('utf8').strip().split(' ')
-            if len(l_split) == 2:
+            # only the word is decoded, so filtered-out lines stay cheap
+            line = line.strip()
+            space_idx = line.find(b' ')
+            if space_idx == -1 or line.find(b' ', space_idx + 1) == -1:
+                # word2vec header
                 continue
             total_vectors_in_file += 1
-            if filter_set is not None and l_split[0] not in filter_set:
+            word = line[:space_idx].decode('utf8')
+            if filter_set is not None and word not in filter_set:
                 continue
-            embs[l_split[0]] = [float(em) for em in l_split[1:]]
+            vec = np.fromstring(line[space_idx + 1:], sep=' ', dtype=np.float32)
+            # fromstring stops at a malformed value instead of raising
+            if vec.size != line.count(b' '):
+                raise ValueError(f"Malformed embedding for {word!r} on line {i + 1} of {path}")
+            embs[word] = vec
     return embs, total_vectors_in_file
 
 
@@ -367,8 +389,14 @@ def calc_vocab_load_stats(vocab, loaded_embed_dict):
 def convert_to_torch_tensor(word_to_float_list_dict, vocab):
     dim = len(next(iter(word_to_float_list_dict.values())))
     tensor = torch.zeros((len(vocab), dim))
-    for word, values in word_to_float_list_dict.items():
-        tensor[vocab.stoi[word]] = torch.Tensor(values)
+    # words missing from the vocab have no row to go to
+    matches = [(word, values) for word, values in word_to_float_list_dict.items() if word in vocab.stoi]
+    if not matches:
+        return tensor
+    words, values = zip(*matches)
+    indices = np.fromiter((vocab.stoi[word] for word in words), dtype=np.int64, count=len(words))
+    matrix = np.asarray(values, dtype=np.float32)
+    tensor[torch.from_numpy(indices)] = torch.from_numpy(matrix)
     return tensor
 
 # FIXME: seems it got nuked during the great refactoring of data
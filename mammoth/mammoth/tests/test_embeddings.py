@@ -1,7 +1,11 @@
 import unittest
-from mammoth.modules.embeddings import Embeddings
+from mammoth.inputters.vocab import Vocab
+from mammoth.modules.embeddings import Embeddings, PositionalEncoding, convert_to_torch_tensor, read_embeddings
 
 import itertools
+import math
+import os
+import tempfile
 from copy import deepcopy
 
 import torch
@@ -138,3 +142,93 @@ class TestEmbeddings(unittest.TestCase):
                         trainable_params[param_name].ne(old_weights[param_name]).any(),
                         param_name + " " + init_case.__str__(),
                     )
+
+
+class TestPositionalEncoding(unittest.TestCase):
+    def test_stepwise_matches_full_sequence(self):
+        dim, seq_len, batch_size = 16, 7, 3
+        pe = PositionalEncoding(0, dim)
+        emb = torch.randn(seq_len, batch_size, dim)
+        expected = emb * math.sqrt(dim) + pe.pe[:seq_len]
+        full = pe(emb)
+        self.assertEqual(full.shape, expected.shape)
+        self.assertTrue(torch.allclose(full, expected, atol=1e-6))
+        for step in range(seq_len):
+            stepwise = pe(emb[step:step + 1], step=step)
+            self.assertEqual(stepwise.shape, (1, batch_size, dim))
+            self.assertTrue(torch.allclose(stepwise, expected[step:step + 1], atol=1e-6), step)
+
+
+class TestReadEmbeddings(unittest.TestCase):
+    GLOVE_PATH = os.path.join(os.path.dirname(__file__), 'sample_glove.txt')
+
+    @classmethod
+    def expected_vectors(cls):
+        with open(cls.GLOVE_PATH, encoding='utf8') as f:
+            rows = [line.strip().split(' ') for line in f]
+        return {row[0]: [float(x) for x in row[1:]] for row in rows}
+
+    def assert_vectors_equal(self, embs, expected):
+        self.assertEqual(set(embs.keys()), set(expected.keys()))
+        for word, values in expected.items():
+            self.assertTrue(torch.allclose(torch.from_numpy(embs[word]), torch.tensor(values)), word)
+
+    def test_read_unfiltered(self):
+        expected = self.expected_vectors()
+        embs, total = read_embeddings(self.GLOVE_PATH)
+        self.assertEqual(total, len(expected))
+        self.assert_vectors_equal(embs, expected)
+
+    def test_read_filtered(self):
+        expected = self.expected_vectors()
+        filter_set = {'the', 'of', 'said', 'not-in-file'}
+        embs, total = read_embeddings(self.GLOVE_PATH, filter_set=filter_set)
+        self.assertEqual(total, len(expected))
+        self.assert_vectors_equal(embs, {w: v for w, v in expected.items() if w in filter_set})
+
+    def test_read_word2vec_header(self):
+        expected = self.expected_vectors()
+        dim = len(next(iter(expected.values())))
+        with open(self.GLOVE_PATH, 'rb') as f:
+            glove = f.read()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'sample_word2vec.txt')
+            with open(path, 'wb') as f:
+                f.write('{} {}\n'.format(len(expected), dim).encode('utf8'))
+                f.write(glove)
+            # header skipped explicitly, as for -embeddings_type word2vec
+            embs, total = read_embeddings(path, skip_lines=1)
+            self.assertEqual(total, len(expected))
+            self.assert_vectors_equal(embs, expected)
+            # header recognized and skipped when not told to
+            embs, total = read_embeddings(path)
+            self.assertEqual(total, len(expected))
+            self.assert_vectors_equal(embs, expected)
+
+    def test_read_malformed_line(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'malformed.txt')
+            with open(path, 'w', encoding='utf8') as f:
+                f.write('the 0.1 0.2 0.3\n')
+                f.write('of 0.4 x 0.6\n')
+            with self.assertRaises(ValueError):
+                read_embeddings(path)
+            # filtered-out lines are not parsed
+            embs, total = read_embeddings(path, filter_set={'the'})
+            self.assertEqual(total, 2)
+            self.assertEqual(list(embs.keys()), ['the'])
+
+
+class TestConvertToTorchTensor(unittest.TestCase):
+    def test_rows_follow_vocab(self):
+        vocab = Vocab(None, items=['a', 'b'])
+        embs = {'b': [1.0, 2.0], 'not-in-vocab': [3.0, 4.0]}
+        tensor = convert_to_torch_tensor(embs, vocab)
+        expected = torch.zeros((len(vocab), 2))
+        expected[vocab.stoi['b']] = torch.tensor([1.0, 2.0])
+        self.assertTrue(torch.equal(tensor, expected))
+
+    def test_no_matching_words(self):
+        vocab = Vocab(None, items=['a', 'b'])
+        tensor = convert_to_torch_tensor({'not-in-vocab': [3.0, 4.0]}, vocab)
+        self.assertTrue(torch.equal(tensor, torch.zeros((len(vocab), 2))))
@@ -0,0 +1,42 @@
+import collections
+import pickle
+import unittest
+
+from mammoth.constants import DefaultTokens
+from mammoth.inputters.vocab import Vocab, DEFAULT_SPECIALS
+
+
+class TestVocab(unittest.TestCase):
+    def test_merge(self):
+        vocab_a = Vocab(None, items=['a', 'b'])
+        vocab_b = Vocab(None, items=['b', 'c', DefaultTokens.UNK])
+        merged = Vocab.merge(vocab_a, vocab_b)
+        self.assertEqual(merged.itos, ['a', 'b', 'c', *DEFAULT_SPECIALS])
+        self.assertEqual(len(merged.stoi), len(merged.itos))
+        for i, token in enumerate(merged.itos):
+            self.assertEqual(merged.stoi[token], i)
+
+    def test_unknown_lookup(self):
+        vocab = Vocab(None, items=['a', 'b'])
+        n_items = len(vocab.stoi)
+        self.assertEqual(vocab.unk_id, vocab.stoi[DefaultTokens.UNK])
+        self.assertEqual(vocab['a'], vocab.stoi['a'])
+        self.assertEqual(vocab['not-in-vocab'], vocab.unk_id)
+        self.assertEqual(len(vocab.stoi), n_items)
+        self.assertNotIn('not-in-vocab', vocab.stoi)
+
+    def test_unpickle_old_vocab(self):
+        vocab = Vocab(None, items=['a', 'b'])
+        # the tokenizer plays no part in the stoi migration
+        vocab.tokenizer = None
+        # mimic a vocab pickled before unk_id: defaultdict stoi, polluted by a failed lookup
+        vocab.stoi = collections.defaultdict(int, vocab.stoi)
+        vocab.stoi['not-in-vocab']
+        del vocab.unk_id
+
+        restored = pickle.loads(pickle.dumps(vocab))
+        self.assertIs(type(restored.stoi), dict)
+        self.assertEqual(restored.stoi, {t: i for i, t in enumerate(restored.itos)})
+        self.assertEqual(len(restored), len(restored.itos))
+        self.assertEqual(restored.unk_id, restored.itos.index(DefaultTokens.UNK))
+        self.assertEqual(restored['not-in-vocab'], restored.unk_id)
@@ -196,7 +196,9 @@ class Inference(object):
         self.dump_beam = dump_beam
         self.block_ngram_repeat = block_ngram_repeat
         self.ignore_when_blocking = ignore_when_blocking
-        self._exclusion_idxs = {self._tgt_vocab.stoi[t] for t in self.ignore_when_blocking}
+        self._exclusion_idxs = {
+            self._tgt_vocab.stoi[t] for t in self.ignore_when_blocking if t in self._tgt_vocab.stoi
+        }
         # self.src_reader = src_reader
         # self.tgt_reader = tgt_reader
         self.replace_unk = replace_unk
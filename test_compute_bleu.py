@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+
+from compute_bleu import decode_tokens, load_vocab_model
+
+
+class TestDecodeTokens(unittest.TestCase):
+    MODEL_PATH = os.path.join(os.path.dirname(__file__), 'vocabs', 'phoenix2014t-2000.model')
+
+    def decode_lines(self, lines):
+        tokenizer = load_vocab_model(self.MODEL_PATH)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'pred.txt')
+            with open(path, 'w') as f:
+                f.writelines(lines)
+            return decode_tokens(path, tokenizer), tokenizer
+
+    def test_matches_per_line_decode(self):
+        lines = ['▁und ▁nun ▁die ▁wetter vorhersage .\n', '▁am ▁tag .\n']
+        decoded, tokenizer = self.decode_lines(lines)
+        self.assertEqual(decoded, [tokenizer.decode_pieces(line.split()[:-1]) for line in lines])
+
+    def test_leading_empty_lines(self):
+        lines = ['\n', '.\n', '▁und ▁nun .\n', '\n']
+        decoded, tokenizer = self.decode_lines(lines)
+        self.assertEqual(decoded, ['', '', tokenizer.decode_pieces(['▁und', '▁nun']), ''])
+
+    def test_empty_file(self):
+        decoded, _ = self.decode_lines([])
+        self.assertEqual(decoded, [])
+
+
+if __name__ == '__main__':
+    unittest.main()